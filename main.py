@@ -1,11 +1,18 @@
+import asyncio
+import codecs
+import copy
 import os
+import re
+from functools import cache
+from pathlib import Path
 from typing import Annotated
-from urllib.parse import urlparse
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from bs4 import BeautifulSoup
+from lxml import etree
 from fastmcp import FastMCP
 from fastmcp.server.auth.providers.bearer import BearerAuthProvider, RSAKeyPair
 from mcp.server.auth.provider import AccessToken
@@ -17,16 +24,56 @@ TOKEN = os.getenv("TOKEN", "12345678")
 MY_NUMBER = os.getenv("MY_NUMBER")
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 PORT = int(os.getenv("PORT", 8080))
+# Per the XDG spec, an unset, empty or relative XDG_CACHE_HOME falls back to ~/.cache
+XDG_CACHE_HOME = os.getenv("XDG_CACHE_HOME", "")
+CACHE_HOME = Path(XDG_CACHE_HOME) if os.path.isabs(XDG_CACHE_HOME) else Path.home() / ".cache"
+KEY_CACHE_PATH = CACHE_HOME / "web-research-mcp" / "public_key.pem"
+
+# Stop reading a page after this many bytes; the first 2 MB hold far more <p> text than we return
+MAX_PAGE_BYTES = 2_000_000
+
+# Captures the first host label of each line of links, e.g. "wikipedia" from "https://www.wikipedia.org/...".
+# Every line yields one match (empty when it has no scheme://host) so results stay aligned with their links.
+HOST_RE = re.compile(r'^(?:[a-z][a-z0-9+.-]*://(?:www\.)?([^/.\s]+))?.*$', re.I | re.M)
+
+# Detects a <meta charset> / http-equiv declaration, which libxml2 honours on its own
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.I)
+
+# Fixed pieces of the research summary, joined around the per-query parts
+SUMMARY_PREFIX = "Based on my research for **'"
+SUMMARY_MID = "'**, here is a summary:\n\n"
+SUMMARY_TAIL = "\n\n--- \n### Where to Learn More\nTop sources:\n"
 
 # Auth and Models
 class RichToolDescription(BaseModel):
     description: str
     use_when: str
 
+@cache
+def load_public_key() -> str:
+    """Returns the provider's public key, reusing the one cached on disk from a previous boot."""
+    try:
+        cached = KEY_CACHE_PATH.read_text()
+        if cached.startswith("-----BEGIN PUBLIC KEY-----"):
+            return cached
+    except OSError:
+        pass
+
+    # RSA keygen is slow, so persist the public half for later restarts.
+    # Write to a temp file and swap it in so a crash never leaves a truncated key behind.
+    public_key = RSAKeyPair.generate().public_key
+    tmp_path = KEY_CACHE_PATH.with_suffix(".tmp")
+    try:
+        KEY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(public_key)
+        os.replace(tmp_path, KEY_CACHE_PATH)
+    except OSError:
+        pass
+    return public_key
+
 class SimpleBearerAuthProvider(BearerAuthProvider):
     def __init__(self, token: str):
-        k = RSAKeyPair.generate()
-        super().__init__(public_key=k.public_key, jwks_uri=None, issuer=None, audience=None)
+        super().__init__(public_key=load_public_key(), jwks_uri=None, issuer=None, audience=None)
         self.token = token
 
     async def load_access_token(self, token: str) -> AccessToken | None:
@@ -36,6 +83,14 @@ class SimpleBearerAuthProvider(BearerAuthProvider):
 
 app = FastMCP("Web Research Assistant MCP", auth=SimpleBearerAuthProvider(TOKEN))
 
+# Shared HTTP/2 client so tool calls reuse pooled keep-alive connections
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(15.0),
+    http2=True,
+    follow_redirects=True,
+)
+
 # Tool Definitions
 ResearchDescription = RichToolDescription(
     description="Performs a web search for a query and provides a detailed summary paragraph, followed by a list of source websites.",
@@ -47,6 +102,68 @@ ScrapeDescription = RichToolDescription(
     use_when="When the user wants the full content of a specific link that was found via web research."
 )
 
+# Serialized once at import and shared by the tool decorators
+RESEARCH_DESC_JSON = ResearchDescription.model_dump_json()
+SCRAPE_DESC_JSON = ScrapeDescription.model_dump_json()
+
+# Helpers
+
+# Serper results keyed by normalized query, so repeated searches skip the API round-trip
+SEARCH_CACHE = TTLCache(maxsize=1024, ttl=600)
+
+# Extracted page text keyed by URL, so re-reading a page skips the download and parse
+SCRAPE_CACHE = TTLCache(maxsize=512, ttl=300)
+
+async def search_serper(query: str) -> dict:
+    """Returns a copy of the Serper response for a query, serving repeats from SEARCH_CACHE."""
+    key = query.strip().lower()
+    data = SEARCH_CACHE.get(key)
+    if data is not None:
+        return copy.deepcopy(data)
+
+    url = "https://google.serper.dev/search"
+    payload = {"q": query.strip(), "num": 5}
+    headers = {'X-API-KEY': SERPER_API_KEY, 'Content-Type': 'application/json'}
+
+    response = await http_client.post(url, headers=headers, content=orjson.dumps(payload), timeout=10.0)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    # Callers get their own copy so nothing they mutate leaks into the cache
+    SEARCH_CACHE[key] = data
+    return copy.deepcopy(data)
+
+def page_encoding(header_charset: str | None, first_chunk: bytes) -> str | None:
+    """Picks the encoding to parse a page with, or None to let libxml2 follow its <meta> tag."""
+    # A charset from the Content-Type header wins, as long as Python knows it
+    if header_charset:
+        try:
+            return codecs.lookup(header_charset).name
+        except LookupError:
+            pass
+
+    if META_CHARSET_RE.search(first_chunk):
+        return None
+
+    # No declared charset: libxml2 would assume Latin-1, so prefer UTF-8 when the bytes are valid UTF-8.
+    # The incremental decoder tolerates a multi-byte character cut off at the end of the chunk.
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(first_chunk)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return None
+
+def extract_page_text(parser: etree.HTMLParser) -> str:
+    """Finishes a fed parser and returns the text of the page's <p> tags, minus boilerplate elements."""
+    doc = parser.close()
+    if doc is None:
+        return ""
+
+    # Clean up DOM elements
+    etree.strip_elements(doc, "script", "style", "nav", "footer", with_tail=False)
+
+    return ' '.join(p.xpath('string()') for p in doc.iter('p'))
+
 # Tools
 
 @app.tool
@@ -62,7 +179,7 @@ async def validate() -> str:
     """Validation for Puch AI Hackathon."""
     return MY_NUMBER if MY_NUMBER else "Validation Number Not Configured"
 
-@app.tool(description=ResearchDescription.model_dump_json())
+@app.tool(description=RESEARCH_DESC_JSON)
 async def perform_web_research(query: Annotated[str, "The user's question or topic to search for."]) -> dict:
     # Validate config
     if not SERPER_API_KEY:
@@ -72,38 +189,20 @@ async def perform_web_research(query: Annotated[str, "The user's question or top
     if not query or not query.strip():
         return {"message": "Error: Search query cannot be empty."}
     
-    url = "https://google.serper.dev/search"
-    payload = {"q": query, "num": 5}
-    headers = {'X-API-KEY': SERPER_API_KEY, 'Content-Type': 'application/json'}
-    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
+        data = await search_serper(query)
 
         if "organic" not in data or not data["organic"]:
             return {"message": f"No results found for '{query}'."}
         
-        first_snippet = data["organic"][0].get('snippet', 'No summary available.')
+        first_snippet = data["organic"][0].get('snippet') or 'No summary available.'
         
-        sources = []
-        for result in data["organic"]:
-            try:
-                domain = urlparse(result['link']).netloc
-                site = domain.replace('www.', '').split('.')[0].title()
-                sources.append(f"- **{result['title']}** (found on {site})")
-            except:
-                continue
-
-        summary = (
-            f"Based on my research for **'{query}'**, here is a summary:\n\n"
-            f"{first_snippet}\n\n"
-            f"--- \n"
-            f"### Where to Learn More\n"
-            f"Top sources:\n"
-            f"{'\n'.join(sources)}"
-        )
+        # Resolve every result's site in one regex pass over the joined links
+        results = [r for r in data["organic"] if r.get('title') and r.get('link')]
+        sites = HOST_RE.findall('\n'.join(r['link'] for r in results))
+        sources = [f"- **{r['title']}** (found on {site.title()})" for r, site in zip(results, sites)]
+
+        summary = ''.join((SUMMARY_PREFIX, query, SUMMARY_MID, first_snippet, SUMMARY_TAIL, '\n'.join(sources)))
         
         return {"message": summary, "results_data": data["organic"]}
         
@@ -112,15 +211,19 @@ async def perform_web_research(query: Annotated[str, "The user's question or top
     except Exception as e:
         return {"message": f"An unexpected search error occurred: {e}"}
 
-@app.tool(description=ScrapeDescription.model_dump_json())
+@app.tool(description=SCRAPE_DESC_JSON)
 async def scrape_webpage_content(url: Annotated[str, "URL to read."]) -> dict:
+    # Entries only hold strings, so a shallow copy keeps callers from mutating the cache
+    cached = SCRAPE_CACHE.get(url)
+    if cached is not None:
+        return dict(cached)
+
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, headers=headers, timeout=15.0)
+        async with http_client.stream("GET", url, headers=headers, timeout=15.0) as response:
             response.raise_for_status()
             
             # Verify content type
@@ -128,22 +231,31 @@ async def scrape_webpage_content(url: Annotated[str, "URL to read."]) -> dict:
             if "text/html" not in content_type and "text/plain" not in content_type:
                 return {"message": f"Error: URL points to '{content_type}', not a webpage."}
             
-            content = response.content
+            # Parse HTML incrementally as chunks arrive, stopping once the size cap is reached.
+            # The parser is created on the first chunk so its encoding can be sniffed from it.
+            parser = None
+            total = 0
+            async for chunk in response.aiter_bytes(65536):
+                if parser is None:
+                    parser = etree.HTMLParser(encoding=page_encoding(response.charset_encoding, chunk))
+                parser.feed(chunk)
+                total += len(chunk)
+                if total >= MAX_PAGE_BYTES:
+                    break
 
-        # Parse HTML
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Clean up DOM elements
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.decompose()
+        if not total:
+            return {"message": "Visited page but found no main text content."}
 
-        paragraphs = soup.find_all('p')
-        text = ' '.join([p.get_text() for p in paragraphs])
+        # Feeding is spread across awaits, but finishing the tree and walking up to 2 MB of it
+        # is one long step, so run it off the event loop to keep other tool calls served
+        text = await asyncio.to_thread(extract_page_text, parser)
         
         if not text.strip():
             return {"message": "Visited page but found no main text content."}
             
-        return {"message": "Extracted text:", "full_text": text.strip()[:5000]}
+        result = {"message": "Extracted text:", "full_text": text.strip()[:5000]}
+        SCRAPE_CACHE[url] = result
+        return dict(result)
 
     except httpx.RequestError as e:
         return {"message": f"Network error: {e}"}
@@ -1,12 +1,20 @@
-import asyncio
-from main import app, PORT
+from main import app, http_client, PORT
+
+# Use the libuv-based event loop where available (not on Windows)
+try:
+    from uvloop import run
+except ImportError:
+    from asyncio import run
 
 async def run_server():
     print(f"Starting server on host 0.0.0.0 and port {PORT}")
-    await app.run_async(transport="http", host="0.0.0.0", port=PORT)
+    try:
+        await app.run_async(transport="http", host="0.0.0.0", port=PORT)
+    finally:
+        await http_client.aclose()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(run_server())
+        run(run_server())
     except KeyboardInterrupt:
         print("\nServer stopped.")
@@ -0,0 +1,11 @@
+import os
+import shutil
+import tempfile
+
+# main writes its public key cache on import, so redirect it before any test module imports main
+CACHE_DIR = tempfile.mkdtemp(prefix="web-research-mcp-tests-")
+os.environ["XDG_CACHE_HOME"] = CACHE_DIR
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
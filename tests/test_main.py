@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+
+
+def serve(body: bytes, content_type: str = "text/html") -> httpx.AsyncClient:
+    """Returns a client whose every GET responds with the given body."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body, headers={"content-type": content_type})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def scrape(url: str) -> dict:
+    tool = getattr(main.scrape_webpage_content, "fn", main.scrape_webpage_content)
+    return asyncio.run(tool(url))
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    main.SCRAPE_CACHE.clear()
+    main.SEARCH_CACHE.clear()
+
+
+def test_scrape_decodes_utf8_page_without_meta_charset(monkeypatch):
+    monkeypatch.setattr(main, "http_client", serve("<p>Café</p>".encode(), "text/html; charset=utf-8"))
+    assert scrape("http://example.test/utf8")["full_text"] == "Café"
+
+
+def test_load_public_key_replaces_empty_cache_file(monkeypatch, tmp_path):
+    key_path = tmp_path / "public_key.pem"
+    key_path.write_text("")
+    monkeypatch.setattr(main, "KEY_CACHE_PATH", key_path)
+    main.load_public_key.cache_clear()
+    try:
+        public_key = main.load_public_key()
+    finally:
+        main.load_public_key.cache_clear()
+
+    assert public_key.startswith("-----BEGIN PUBLIC KEY-----")
+    assert key_path.read_text() == public_key
+
+
+def test_scrape_keeps_words_around_inline_markup(monkeypatch):
+    body = b"<p>H<b>ello</b> see <a>link</a>.</p><p>Second</p>"
+    monkeypatch.setattr(main, "http_client", serve(body))
+    assert scrape("http://example.test/inline")["full_text"] == "Hello see link. Second"
+
+
+def test_search_sends_original_query_and_caches_by_normalized_key(monkeypatch):
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.content)
+        return httpx.Response(200, json={"organic": []})
+
+    monkeypatch.setattr(main, "SERPER_API_KEY", "test-key")
+    monkeypatch.setattr(main, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    asyncio.run(main.search_serper("  Python GIL "))
+    asyncio.run(main.search_serper("python gil"))
+
+    assert sent == [b'{"q":"Python GIL","num":5}']
+
+
+def test_research_names_sites_for_any_url_scheme(monkeypatch):
+    async def fake_search(query):
+        return {"organic": [
+            {"title": "A", "link": "https://www.wikipedia.org/wiki/GIL", "snippet": "snip"},
+            {"title": "B"},
+            {"title": "C", "link": "ftp://x.y/file"},
+        ]}
+
+    monkeypatch.setattr(main, "SERPER_API_KEY", "test-key")
+    monkeypatch.setattr(main, "search_serper", fake_search)
+    tool = getattr(main.perform_web_research, "fn", main.perform_web_research)
+    message = asyncio.run(tool("gil"))["message"]
+
+    assert message.endswith("- **A** (found on Wikipedia)\n- **C** (found on X)")
+
+
+def test_scrape_detects_utf8_page_without_any_declared_charset(monkeypatch):
+    monkeypatch.setattr(main, "http_client", serve("<p>Café</p>".encode(), "text/html"))
+    assert scrape("http://example.test/utf8-bare")["full_text"] == "Café"
+
+
+def test_scrape_ignores_unknown_header_charset(monkeypatch):
+    monkeypatch.setattr(main, "http_client", serve("<p>Café</p>".encode(), "text/html; charset=bogus"))
+    assert scrape("http://example.test/bogus")["full_text"] == "Café"
+
+
+def test_scrape_follows_meta_charset_when_header_has_none(monkeypatch):
+    body = '<html><head><meta charset="iso-8859-1"></head><body><p>Café</p></body></html>'.encode("latin-1")
+    monkeypatch.setattr(main, "http_client", serve(body, "text/html"))
+    assert scrape("http://example.test/latin1")["full_text"] == "Café"
+
+
+def test_search_results_are_isolated_from_the_cache(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"organic": [{"title": "A", "link": "https://a.test"}]})
+
+    monkeypatch.setattr(main, "SERPER_API_KEY", "test-key")
+    monkeypatch.setattr(main, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    first = asyncio.run(main.search_serper("gil"))
+    first["organic"][0]["title"] = "mutated"
+    first["organic"].clear()
+
+    assert asyncio.run(main.search_serper("gil")) == {"organic": [{"title": "A", "link": "https://a.test"}]}
+
+
+def test_scrape_results_are_isolated_from_the_cache(monkeypatch):
+    monkeypatch.setattr(main, "http_client", serve(b"<p>Hello</p>"))
+    scrape("http://example.test/cached")["full_text"] = "mutated"
+
+    assert scrape("http://example.test/cached")["full_text"] == "Hello"